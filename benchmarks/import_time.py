@@ -0,0 +1,70 @@
+"""
+Import time benchmark.
+
+Measures ``import singyeong`` followed by building a Target in fresh interpreters, and fails when the median
+exceeds the budget or when heavy modules (websockets, codecs, asyncio) get imported along the way.
+
+    python benchmarks/import_time.py --runs 20 --budget-ms 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('websockets', 'msgpack', 'ujson', 'asyncio')
+
+SNIPPET = f"""
+import sys, time
+start = time.perf_counter()
+import singyeong
+singyeong.Target(application="app", operators=[singyeong.Equal("/key", 1)])
+print(time.perf_counter() - start)
+print(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+"""
+
+
+def measure():
+    output = subprocess.run(
+        [sys.executable, "-c", SNIPPET],
+        cwd=ROOT,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True
+    ).stdout.splitlines()
+
+    loaded = output[1].split(",") if len(output) > 1 and output[1] else []
+    return float(output[0]), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    timings = []
+    loaded = set()
+    for _ in range(args.runs):
+        elapsed, modules = measure()
+        timings.append(elapsed * 1000)
+        loaded.update(modules)
+
+    median = statistics.median(timings)
+    print(f"import singyeong + Target: median {median:.2f}ms, min {min(timings):.2f}ms over {args.runs} runs")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(sorted(loaded))}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median exceeds budget of {args.budget_ms:.2f}ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,13 +6,57 @@ __version__ = '1.0.2a'
 
 __path__ = __import__('pkgutil').extend_path(__path__, __name__)
 
+import importlib
+import sys
 from collections import namedtuple
 
-from .client import Client
-from .query import VersionType, Equal, NotEqual, GreaterThan, GreaterThanEqual, LessThan, LessThanEqual, \
-    In, Contains, NotContains, And, Or, Nor, Minimum, Maximum, Average, Target
-from .message import Message
+# Public names and the submodules defining them. Submodules are imported on first attribute access,
+# so e.g. building a Target does not import websockets.
+_lazy = {
+    'Client': 'client',
+    'SyncClient': 'sync',
+    'Lane': 'enums',
+    'RateLimitPolicy': 'enums',
+    'Message': 'message',
+    'Chunk': 'chunking',
+}
+_lazy.update(dict.fromkeys((
+    'VersionType', 'Equal', 'NotEqual', 'GreaterThan', 'GreaterThanEqual', 'LessThan', 'LessThanEqual',
+    'In', 'Contains', 'NotContains', 'And', 'Or', 'Nor', 'Minimum', 'Maximum', 'Average', 'Target'
+), 'query'))
+
+# Submodules stay reachable as attributes (``singyeong.client``), as they were when everything was imported eagerly.
+_submodules = frozenset((
+    'backoff', 'capture', 'chunking', 'client', 'codec', 'connector', 'dedup', 'dsn', 'enums', 'exceptions',
+    'fanout', 'loopback', 'message', 'metrics', 'monitor', 'query', 'ratelimit', 'scheduler', 'sync', 'types',
+    'utils', 'websocket'
+))
 
 VersionInfo = namedtuple('VersionInfo', 'major minor micro releaselevel serial')
 
 version_info = VersionInfo(major=1, minor=0, micro=1, releaselevel='alpha', serial=0)
+
+__all__ = ['VersionInfo', 'version_info', *_lazy]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module(f'.{name}', __name__)
+
+    try:
+        module = _lazy[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy, *_submodules})
+
+
+if sys.version_info < (3, 7):  # Module __getattr__ (PEP 562) is not supported, import everything eagerly.
+    for _name in _lazy:
+        __getattr__(_name)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import mmap
+import struct
+import time
+from typing import Iterator, Optional, Tuple, Union
+
+from .enums import Encoding, OpCode
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"SGYCAP\x00\x01"
+HEADER = struct.Struct("<8sB")
+RECORD = struct.Struct("<dBI")
+
+_ENCODINGS = [Encoding.JSON, Encoding.MSGPACK]
+_TEXT = 0
+_BINARY = 1
+_SESSION = 2
+
+
+class CaptureWriter:
+    """
+    Appends raw inbound frames to a capture file.
+
+    The file starts with a header holding the connection encoding, followed by one record per frame: monotonic
+    timestamp, frame type (text or binary), length and the frame itself. Every writer starts with an empty session
+    record, so frames appended by later runs are not paced against the clock of earlier ones.
+    """
+
+    def __init__(self, path, encoding: Encoding):
+        self.path = path
+        self._file = open(path, "ab", buffering=1 << 16)
+
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, _ENCODINGS.index(encoding)))
+        elif _read_header(path) != encoding:
+            self._file.close()
+            raise ValueError(f"{path} contains frames of a different encoding")
+
+        self._file.write(RECORD.pack(time.monotonic(), _SESSION, 0))
+
+    def write(self, frame: Union[str, bytes]):
+        if isinstance(frame, str):
+            kind, frame = _TEXT, frame.encode()
+        else:
+            kind = _BINARY
+
+        self._file.write(RECORD.pack(time.monotonic(), kind, len(frame)))
+        self._file.write(frame)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CaptureReader:
+    """Reads a capture file through mmap, yielding ``(timestamp, frame)`` tuples, with a None frame per session."""
+
+    def __init__(self, path):
+        self.path = path
+        self.encoding = _read_header(path)
+
+    def __iter__(self) -> Iterator[Tuple[float, Optional[Union[str, bytes]]]]:
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer, \
+                memoryview(buffer) as view:
+            offset = HEADER.size
+            end = len(buffer)
+
+            while offset + RECORD.size <= end:
+                timestamp, kind, length = RECORD.unpack_from(buffer, offset)
+                offset += RECORD.size
+
+                if offset + length > end:
+                    log.warning("Capture %s is truncated at offset %d", self.path, offset - RECORD.size)
+                    break
+
+                if kind == _SESSION:
+                    data = None
+                else:
+                    with view[offset:offset + length] as frame:
+                        data = str(frame, "utf-8") if kind == _TEXT else bytes(frame)
+                offset += length
+
+                yield timestamp, data
+
+
+def _read_header(path) -> Encoding:
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a capture file")
+
+    magic, encoding = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a capture file")
+
+    return _ENCODINGS[encoding]
+
+
+async def replay(client, path, *, speed: Optional[float] = 1.0, max_gap: float = 10.0) -> int:
+    """
+    Feeds captured frames through the decode and dispatch path of the client.
+
+    Frames are replayed with their original spacing divided by ``speed``; ``None`` replays them as fast as
+    possible. Pacing restarts with every capture session, and gaps longer than ``max_gap`` seconds (or going
+    backwards, in captures without session records) are skipped. Only DISPATCH frames reach the handlers, the
+    client does not need to be connected.
+    Returns the number of replayed frames.
+    """
+    from .websocket import SingyeongSocket
+
+    reader = CaptureReader(path)
+    if reader.encoding != client.dsn.encoding:
+        raise ValueError(f"{path} was captured with {reader.encoding.value} encoding")
+
+    ws = SingyeongSocket.for_client(client, loop=client.loop)
+    count = 0
+    first = started = last = None
+
+    for timestamp, frame in reader:
+        if frame is None:  # A new session, its timestamps are unrelated to the previous one.
+            first = None
+            continue
+
+        if first is None or not 0 <= timestamp - last <= max_gap:
+            first, started = timestamp, time.monotonic()
+        last = timestamp
+
+        if speed:
+            delay = started + (timestamp - first) / speed - time.monotonic()
+            await asyncio.sleep(max(delay, 0))
+        else:
+            await asyncio.sleep(0)  # Let dispatched handlers run.
+
+        data = ws._decode(frame)
+        if isinstance(data, dict) and data.get('op') == OpCode.DISPATCH:
+            ws.handle_dispatch(data)
+
+        count += 1
+
+    return count
@@ -0,0 +1,147 @@
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterator, Optional, Union
+
+log = logging.getLogger(__name__)
+
+CHUNK_KEY = "__singyeong_chunk__"
+
+
+class Chunk:
+    __slots__ = ('id', 'seq', 'total', 'data', 'encoding', 'nonce', 'timestamp', 'event_name')
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.pop("id")
+        self.seq = kwargs.pop("seq")
+        self.total = kwargs.pop("total")
+        self.data = kwargs.pop("data")
+        self.encoding = kwargs.pop("encoding")
+        self.nonce = kwargs.pop("nonce")
+        self.timestamp = kwargs.pop("timestamp")
+        self.event_name = kwargs.pop("event_name")
+
+    @classmethod
+    def from_envelope(cls, envelope: dict, *, timestamp, event_name):
+        return cls(
+            id=envelope['id'],
+            seq=int(envelope['seq']),
+            total=int(envelope['total']),
+            data=envelope['data'],
+            encoding=envelope.get('encoding', "json"),
+            nonce=envelope.get('nonce'),
+            timestamp=timestamp,
+            event_name=event_name
+        )
+
+    def __repr__(self):
+        return f"Chunk(" \
+               f"id={self.id!r}, " \
+               f"seq={self.seq!r}, " \
+               f"total={self.total!r}, " \
+               f"encoding={self.encoding!r}, " \
+               f"nonce={self.nonce!r}, " \
+               f"timestamp={self.timestamp!r}, " \
+               f"event_name={self.event_name!r}" \
+               f")"
+
+
+def split(encoded: Union[str, bytes], size: int, *, chunk_id: str, encoding: str, nonce=None) -> Iterator[dict]:
+    """Yields chunk envelopes of at most ``size`` characters (or bytes) of a payload encoded with ``encoding``."""
+    total = (len(encoded) + size - 1) // size
+
+    for seq in range(total):
+        envelope = {
+            "id": chunk_id,
+            "seq": seq,
+            "total": total,
+            "encoding": encoding,
+            "data": encoded[seq * size:(seq + 1) * size]
+        }
+
+        if nonce is not None:
+            envelope['nonce'] = nonce
+
+        yield {CHUNK_KEY: envelope}
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex
+
+
+class _Partial:
+    __slots__ = ('pieces', 'received', 'size', 'deadline')
+
+    def __init__(self, total, deadline):
+        self.pieces = [None] * total
+        self.received = 0
+        self.size = 0
+        self.deadline = deadline
+
+
+class Reassembler:
+    """
+    Collects chunks until a payload is complete.
+
+    At most ``max_bytes`` of partial payloads are buffered; the oldest ones are dropped when the limit is reached.
+    Partial payloads that are not completed within ``timeout`` seconds are dropped too.
+    """
+
+    def __init__(self, *, max_bytes=64 << 20, timeout=30.0):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+        self._partials = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._partials)
+
+    def feed(self, chunk: Chunk) -> Optional[Union[str, bytes]]:
+        """Stores the chunk and returns the joined payload once all chunks have been received."""
+        now = time.monotonic()
+        self._expire(now)
+
+        if not 0 <= chunk.seq < chunk.total:
+            log.warning("Dropping chunk %s with invalid sequence %d/%d", chunk.id, chunk.seq, chunk.total)
+            return None
+
+        partial = self._partials.get(chunk.id)
+        if partial is None:
+            partial = self._partials[chunk.id] = _Partial(chunk.total, now + self.timeout)
+        elif len(partial.pieces) != chunk.total:
+            log.warning("Dropping chunk %s with mismatched total %d", chunk.id, chunk.total)
+            return None
+
+        if partial.pieces[chunk.seq] is not None:
+            return None
+
+        partial.pieces[chunk.seq] = chunk.data
+        partial.received += 1
+        partial.size += len(chunk.data)
+        self._size += len(chunk.data)
+
+        if partial.received == chunk.total:
+            self._discard(chunk.id)
+            return (b'' if isinstance(chunk.data, bytes) else '').join(partial.pieces)
+
+        while self._size > self.max_bytes:
+            chunk_id = next(iter(self._partials))
+            log.warning("Reassembly buffer is full, dropping partial payload %s", chunk_id)
+            self._discard(chunk_id)
+
+        return None
+
+    def _expire(self, now):
+        while self._partials:
+            chunk_id, partial = next(iter(self._partials.items()))
+            if partial.deadline > now:
+                break
+            log.warning("Timed out waiting for chunks of %s (%d/%d received)",
+                        chunk_id, partial.received, len(partial.pieces))
+            self._discard(chunk_id)
+
+    def _discard(self, chunk_id):
+        partial = self._partials.pop(chunk_id)
+        self._size -= partial.size
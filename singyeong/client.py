@@ -1,42 +1,105 @@
 import asyncio
+import importlib.util
 import logging
-import signal
-import traceback
+import time
 import warnings
 
-import websockets
-
+from . import loopback as _loopback
 from .backoff import ExponentialBackoff
+from .capture import CaptureWriter
+from .chunking import Chunk, Reassembler
+from .dedup import NonceCache
 from .dsn import DSN
-from .enums import Encoding, OpCode
+from .enums import Encoding, OpCode, RateLimitPolicy
 from .exceptions import UnsupportedEncoding, WSClosed
 from .message import Message
 from .query import Target
+from .ratelimit import RateLimiter
 from .utils import maybe_coroutine, with_type
-from .websocket import SingyeongSocket
 
 log = logging.getLogger(__name__)
 
 
 class Client:
     # noinspection PyTypeChecker
-    def __init__(self, dsn, *, loop=None, namespace=None):
+    def __init__(
+            self, dsn, *,
+            loop=None,
+            namespace=None,
+            lane_weights=None,
+            lane_budgets=None,
+            chunk_threshold=None,
+            chunk_size=64 << 10,
+            chunk_buffer=64 << 20,
+            chunk_timeout=30.0,
+            stream_chunks=False,
+            rate_limit=None,
+            application_rate_limit=None,
+            event_rate_limits=None,
+            rate_limit_policy=RateLimitPolicy.WAIT,
+            dedup_size=None,
+            dedup_ttl=60.0,
+            capture=None,
+            monitor_threshold=None,
+            loopback=False,
+            metrics=None,
+            metrics_interval=5.0,
+            standby=False,
+            dns_ttl=300.0
+    ):
         self.ws = None
         self.dsn = DSN(dsn)
         self.loop = asyncio.get_event_loop() if loop is None else loop
         self.namespace = namespace
-
-        if self.dsn.encoding == Encoding.MSGPACK:  # Is msgpack installed?
-            try:
-                import msgpack
-            except ImportError:
-                raise ImportError("Unsupported MSGPACK encoding. Type 'pip install msgpack'.")
+        self.lane_weights = lane_weights
+        self.lane_budgets = lane_budgets
+        self.chunk_threshold = chunk_threshold
+        self.chunk_size = chunk_size
+        self.stream_chunks = stream_chunks
+        self.standby = standby
+        self.dns_ttl = dns_ttl
+
+        if rate_limit is None and application_rate_limit is None and not event_rate_limits:
+            self.rate_limiter = None
+        else:
+            self.rate_limiter = RateLimiter(
+                total=rate_limit,
+                application=application_rate_limit,
+                events=event_rate_limits,
+                policy=rate_limit_policy
+            )
+
+        # Is msgpack installed? It is imported only once connecting.
+        if self.dsn.encoding == Encoding.MSGPACK and importlib.util.find_spec("msgpack") is None:
+            raise ImportError("Unsupported MSGPACK encoding. Type 'pip install msgpack'.")
 
         if self.dsn.encoding == Encoding.ETF:
             warnings.warn(f"Unsupported ETF encoding. Switching to JSON.", UnsupportedEncoding)
             self.dsn.encoding = Encoding.JSON
 
         self._metadata = {}
+        self._reassembler = Reassembler(max_bytes=chunk_buffer, timeout=chunk_timeout)
+        self._dedup = None if not dedup_size else NonceCache(dedup_size, dedup_ttl)
+        self._capture = None if capture is None else CaptureWriter(capture, self.dsn.encoding)
+        self.loopback = loopback
+        if loopback:
+            _loopback.register(self)
+
+        self.monitor = None
+        if monitor_threshold is not None:
+            from .monitor import LoopMonitor
+            self.monitor = LoopMonitor(self.loop, threshold=monitor_threshold)
+
+        self.inflight = 0
+        self.metrics = None
+        if metrics:
+            from .metrics import MetricsPublisher, default_providers
+            self.metrics = MetricsPublisher(
+                self,
+                default_providers() if metrics is True else list(metrics),
+                interval=metrics_interval
+            )
+        self._connector = None
         self._closing = False
         self._ready = asyncio.Event()
 
@@ -51,26 +114,40 @@ class Client:
         log.debug('%s has successfully been registered as an event', coro.__name__)
         return coro
 
-    async def send(self, target: [dict, Target], payload, nonce=None):
-
-        data = {
-            "target": target if isinstance(target, dict) else target.as_dict(),
-            "payload": payload
-        }
-
-        if nonce is not None:
-            data['nonce'] = nonce
-
-        await self.ws.send_json({
-            "op": OpCode.DISPATCH,
-            "t": "SEND",
-            "d": data
-        })
-
-    async def broadcast(self, target: [dict, Target], payload, nonce=None):
+    async def send(self, target: [dict, Target], payload, nonce=None) -> bool:
+        """Sends the payload to a single client. Returns False if it has been dropped by the rate limiter."""
+        return await self._dispatch("SEND", target, payload, nonce)
+
+    async def broadcast(self, target: [dict, Target], payload, nonce=None) -> bool:
+        """Sends the payload to every matching client. Returns False if it has been dropped by the rate limiter."""
+        return await self._dispatch("BROADCAST", target, payload, nonce)
+
+    async def _dispatch(self, event, target, payload, nonce):
+        target = target if isinstance(target, dict) else target.as_dict()
+
+        if self.rate_limiter is not None:
+            allowed = await self.rate_limiter.acquire(
+                event,
+                target.get('application'),
+                target.get('droppable', False)
+            )
+
+            if not allowed:
+                return False
+
+        if self.loopback and event == "SEND":
+            receiver = _loopback.resolve(self, target)
+            if receiver is not None:
+                receiver.loop.create_task(receiver._on_raw_packet(Message(
+                    nonce=nonce,
+                    payload=payload,
+                    timestamp=int(time.time() * 1000),
+                    event_name=event
+                )))
+                return True
 
         data = {
-            "target": target if isinstance(target, dict) else target.as_dict(),
+            "target": target,
             "payload": payload
         }
 
@@ -79,9 +156,10 @@ class Client:
 
         await self.ws.send_json({
             "op": OpCode.DISPATCH,
-            "t": "BROADCAST",
+            "t": event,
             "d": data
         })
+        return True
 
     async def update_metadata(self, md):
         self._metadata.update(md)
@@ -95,11 +173,15 @@ class Client:
 
     # noinspection PyMethodMayBeStatic, PyUnusedLocal
     def on_error(self, exc):
+        import traceback
         traceback.print_exc()
 
     async def on_raw_packet(self, message: Message):
         """Called when the 신경 has sent to you BROADCAST or SEND event."""
 
+    async def on_chunk(self, chunk: Chunk):
+        """Called for every chunk of a large payload when the client was created with stream_chunks=True."""
+
     async def on_ready(self):
         """Called when the 신경 has accepted you, and will send you packets. Usually after login is successful."""
 
@@ -113,15 +195,29 @@ class Client:
 
         self._ready.set()
         try:
-            await maybe_coroutine(self.on_ready)
+            await self._call_handler(self.on_ready)
         except Exception as ex:
-            await maybe_coroutine(self.on_error, ex)
+            await self._call_handler(self.on_error, ex)
 
     async def _on_raw_packet(self, message):
+        self.inflight += 1
         try:
-            await maybe_coroutine(self.on_raw_packet, message)
+            await self._call_handler(self.on_raw_packet, message)
         except Exception as ex:
-            await maybe_coroutine(self.on_error, ex)
+            await self._call_handler(self.on_error, ex)
+        finally:
+            self.inflight -= 1
+
+    async def _on_chunk(self, chunk):
+        try:
+            await self._call_handler(self.on_chunk, chunk)
+        except Exception as ex:
+            await self._call_handler(self.on_error, ex)
+
+    async def _call_handler(self, f, *args):
+        if self.monitor is None:
+            return await maybe_coroutine(f, *args)
+        return await self.monitor.call(f, *args)
 
     async def wait_until_ready(self):
         await self._ready.wait()
@@ -133,7 +229,24 @@ class Client:
             await self.ws.close()
             self.ws = None
 
+        if self._connector is not None:
+            await self._connector.close()
+
+        if self._capture is not None:
+            self._capture.close()
+
+        if self.monitor is not None:
+            self.monitor.stop()
+
+        if self.metrics is not None:
+            self.metrics.stop()
+
+        if self.loopback:
+            _loopback.unregister(self)
+
     def run(self):
+        import signal
+
         loop = self.loop
 
         try:
@@ -172,11 +285,23 @@ class Client:
                 return None
 
     async def connect(self):
+        import websockets
+        from .connector import Connector
+
         backoff = ExponentialBackoff()
 
+        if self._connector is None:
+            self._connector = Connector(self, standby=self.standby, dns_ttl=self.dns_ttl)
+
+        if self.monitor is not None:
+            self.monitor.start()
+
+        if self.metrics is not None:
+            self.metrics.start()
+
         while not self._closing:
             try:
-                self.ws = await SingyeongSocket.from_client(self)
+                self.ws = await self._connector.connect()
                 while True:
                     await self.ws.poll_event()
             except asyncio.CancelledError:
@@ -192,7 +317,7 @@ class Client:
                     websockets.InvalidHandshake,
                     websockets.WebSocketProtocolError,
                     WSClosed,
-                    websockets.InvalidMessage):
+                    websockets.InvalidMessage) as ex:
 
                 if self._closing:
                     return
@@ -200,6 +325,18 @@ class Client:
                 if self.ws:
                     await self.ws.close()
 
+                # Only a session which reached READY resets the backoff and may fail over without waiting, so a
+                # gateway accepting HELLO but rejecting IDENTIFY is not hammered with standby connections.
+                reached_ready = self._ready.is_set()
+                self._ready.clear()
+
+                if reached_ready:
+                    backoff = ExponentialBackoff()
+
+                    if self._connector.warm:
+                        log.warning("Switching to the standby connection: %r", ex)
+                        continue
+
                 retry = backoff.delay()
                 log.exception("Attempting a reconnect in %.2fs", retry)
                 await asyncio.sleep(retry)
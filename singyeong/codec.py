@@ -0,0 +1,30 @@
+from typing import Callable, Dict, Tuple
+
+from .enums import Encoding
+
+Codec = Tuple[Callable, Callable]
+
+_codecs: Dict[Encoding, Codec] = {}
+
+
+def get_codec(encoding: Encoding) -> Codec:
+    """Returns ``(dumps, loads)`` for the encoding. Codec libraries are imported on first use."""
+    try:
+        return _codecs[encoding]
+    except KeyError:
+        pass
+
+    if encoding == Encoding.JSON:
+        try:
+            import ujson as json
+        except ImportError:
+            import json
+        codec = json.dumps, json.loads
+    elif encoding == Encoding.MSGPACK:
+        import msgpack
+        codec = msgpack.packb, msgpack.unpackb
+    else:
+        raise RuntimeError(f"Unsupported encoding: {encoding}")
+
+    _codecs[encoding] = codec
+    return codec
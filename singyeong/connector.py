@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import socket
+import ssl
+import time
+
+log = logging.getLogger(__name__)
+
+
+class Resolver:
+    """Caches resolved gateway addresses for ``ttl`` seconds."""
+
+    def __init__(self, *, ttl=300.0):
+        self.ttl = ttl
+
+        self._cache = {}
+
+    async def resolve(self, loop, host, port):
+        now = time.monotonic()
+        entry = self._cache.get((host, port))
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[(host, port)] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host, port):
+        self._cache.pop((host, port), None)
+
+
+class _ResumingContext(ssl.SSLContext):
+    """SSL context offering the last remembered session, asyncio does not pass ``session`` itself."""
+
+    session = None
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = self.session
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+
+class Connector:
+    """
+    Opens gateway connections for a client.
+
+    Resolved addresses are cached, a single SSL context is reused and offers the previous TLS session for
+    resumption. With ``standby`` enabled a second socket is kept connected up to HELLO, so a reconnect only
+    needs to send IDENTIFY on it.
+    """
+
+    def __init__(self, client, *, standby=False, dns_ttl=300.0, warm_timeout=10.0):
+        self.client = client
+        self.standby = standby
+        self.warm_timeout = warm_timeout
+        self.resolver = Resolver(ttl=dns_ttl)
+
+        self._ssl_context = None
+        self._standby_socket = None
+        self._standby_task = None
+
+    @property
+    def warm(self):
+        """Whether a standby socket is ready to take over"""
+        return self._standby_socket is not None and self._standby_socket.warm
+
+    @property
+    def ssl_context(self):
+        if self._ssl_context is None:
+            context = _ResumingContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.load_default_certs()
+            self._ssl_context = context
+        return self._ssl_context
+
+    def _remember_session(self, ws):
+        if ws is None or ws.transport is None or self._ssl_context is None:
+            return
+
+        ssl_object = ws.transport.get_extra_info('ssl_object')
+        if ssl_object is not None and ssl_object.session is not None:
+            self._ssl_context.session = ssl_object.session
+
+    async def _open(self, *, standby=False):
+        from .websocket import SingyeongSocket
+
+        dsn = self.client.dsn
+        addresses = await self.resolver.resolve(self.client.loop, dsn.host, dsn.port)
+        kwargs = {"port": dsn.port}
+
+        if dsn.encryption:
+            kwargs['ssl'] = self.ssl_context
+            kwargs['server_hostname'] = dsn.host
+
+        for address in addresses:
+            try:
+                ws = await SingyeongSocket.from_client(self.client, standby=standby, host=address, **kwargs)
+            except OSError as ex:
+                log.debug("Could not connect to %s: %r", address, ex)
+                error = ex
+            else:
+                break
+        else:
+            # Every cached address failed, resolve again on the next attempt.
+            self.resolver.invalidate(dsn.host, dsn.port)
+            raise error
+
+        if dsn.encryption:
+            ssl_object = ws.transport.get_extra_info('ssl_object')
+            log.debug("TLS session %s.", "resumed" if ssl_object and ssl_object.session_reused else "negotiated")
+
+        return ws
+
+    async def connect(self):
+        self._remember_session(self.client.ws)
+
+        ws, self._standby_socket = self._standby_socket, None
+        if ws is not None and ws.warm:
+            await ws.activate()
+        else:
+            if ws is not None:
+                await ws.close()
+            ws = await self._open()
+
+        if self.standby and (self._standby_task is None or self._standby_task.done()):
+            self._standby_task = self.client.loop.create_task(self._warm_standby())
+
+        return ws
+
+    async def _warm_standby(self):
+        # The ready flag is cleared whenever a connection drops, so this waits for READY of the connection just
+        # opened. By then it has received its TLS session ticket.
+        await self.client.wait_until_ready()
+        self._remember_session(self.client.ws)
+
+        try:
+            ws = await self._open(standby=True)
+            await asyncio.wait_for(ws.poll_event(), self.warm_timeout)  # HELLO
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            log.warning("Could not open a standby connection: %r", ex)
+            return
+
+        if not ws.warm:
+            await ws.close()
+            return
+
+        log.debug("Standby connection is ready.")
+        self._standby_socket = ws
+
+    async def close(self):
+        if self._standby_task is not None:
+            self._standby_task.cancel()
+            self._standby_task = None
+
+        if self._standby_socket is not None:
+            await self._standby_socket.close()
+            self._standby_socket = None
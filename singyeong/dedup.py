@@ -0,0 +1,44 @@
+import time
+from collections import OrderedDict
+
+
+class NonceCache:
+    """
+    Bounded set of recently seen nonces.
+
+    Nonces are forgotten after ``ttl`` seconds, or earlier when more than ``maxsize`` of them are stored.
+    """
+
+    def __init__(self, maxsize=65536, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._expiry = OrderedDict()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def __contains__(self, nonce):
+        expiry = self._expiry.get(nonce)
+        return expiry is not None and expiry > time.monotonic()
+
+    def seen(self, nonce) -> bool:
+        """Remembers the nonce and returns whether it has already been seen within the window."""
+        now = time.monotonic()
+        expiry = self._expiry
+
+        # Insertion order is expiry order, so expired nonces are always at the front.
+        while expiry and next(iter(expiry.values())) <= now:
+            expiry.popitem(last=False)
+
+        try:
+            if nonce in expiry:
+                return True
+        except TypeError:  # Unhashable nonce, cannot be tracked.
+            return False
+
+        expiry[nonce] = now + self.ttl
+        if len(expiry) > self.maxsize:
+            expiry.popitem(last=False)
+
+        return False
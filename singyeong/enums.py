@@ -17,3 +17,16 @@ class Encoding(Enum):
     JSON = "json"
     ETF = "etf"
     MSGPACK = "msgpack"
+
+
+class Lane(IntEnum):
+    CONTROL = 0
+    METADATA = 1
+    SEND = 2
+    BROADCAST = 3
+
+
+class RateLimitPolicy(Enum):
+    WAIT = "wait"
+    DROP = "drop"
+    DROP_DROPPABLE = "droppable"
@@ -0,0 +1,258 @@
+import asyncio
+import errno
+import logging
+import os
+import stat
+import struct
+
+from .codec import get_codec
+from .enums import Encoding
+from .exceptions import SingyeongException, WSClosed
+from .message import Message
+from .query import Target
+from .utils import maybe_coroutine
+
+log = logging.getLogger(__name__)
+
+LENGTH = struct.Struct(">I")
+
+
+def _pack(dumps, data) -> bytes:
+    encoded = dumps(data)
+    if isinstance(encoded, str):
+        encoded = encoded.encode()
+    return LENGTH.pack(len(encoded)) + encoded
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return await reader.readexactly(length)
+
+
+class FanoutHub:
+    """
+    Shares the connection of a client with worker processes on the same host.
+
+    Messages received by the client are handed to connected workers over a Unix socket: SEND messages to one
+    worker in turn, BROADCAST messages to every worker (or to one of them if ``broadcast_all`` is False).
+    Workers send and broadcast through the client; their requests are forwarded concurrently and the result is sent
+    back to them. Without connected workers messages are handled by the client as usual.
+
+    Anyone who can connect to the socket can send as the application, so it is created with ``mode`` permissions.
+    """
+
+    def __init__(self, client, path, *, broadcast_all=True, mode=0o600):
+        self.client = client
+        self.path = path
+        self.broadcast_all = broadcast_all
+        self.mode = mode
+
+        self._dumps, self._loads = get_codec(client.dsn.encoding)
+        self._workers = []
+        self._next = 0
+        self._server = None
+
+        # Hooked below the public handler, which stays the client's own and keeps its error handling.
+        self._fallback = client._on_raw_packet
+        client._on_raw_packet = self.dispatch
+
+    @property
+    def workers(self):
+        return len(self._workers)
+
+    async def start(self):
+        if os.path.exists(self.path):
+            await self._remove_stale_socket()
+
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, self.mode)
+
+    async def _remove_stale_socket(self):
+        if not stat.S_ISSOCK(os.stat(self.path).st_mode):
+            raise FileExistsError(errno.EEXIST, "Not a socket", self.path)
+
+        try:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Left behind by a hub which has not been closed.
+            os.unlink(self.path)
+        else:
+            writer.close()
+            raise OSError(errno.EADDRINUSE, "Another hub is listening", self.path)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for writer in list(self._workers):
+            writer.close()
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def dispatch(self, message: Message):
+        workers = self._workers
+        if not workers:
+            return await self._fallback(message)
+
+        if message.event_name == "BROADCAST" and self.broadcast_all:
+            targets = list(workers)
+        else:
+            self._next = (self._next + 1) % len(workers)
+            targets = [workers[self._next]]
+
+        frame = _pack(self._dumps, {
+            "nonce": message.nonce,
+            "payload": message.payload,
+            "timestamp": message.timestamp,
+            "event_name": message.event_name
+        })
+
+        for writer in targets:
+            writer.write(frame)
+
+        for writer in targets:
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # The first frame tells the worker which codec is used for the rest.
+        writer.write(LENGTH.pack(len(self.client.dsn.encoding.value)) + self.client.dsn.encoding.value.encode())
+        self._workers.append(writer)
+        log.info("Worker connected, %d workers", len(self._workers))
+
+        try:
+            while True:
+                request = self._loads(await _read_frame(reader))
+                self.client.loop.create_task(self._forward(writer, request))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._workers.remove(writer)
+            writer.close()
+            log.info("Worker disconnected, %d workers", len(self._workers))
+
+    async def _forward(self, writer: asyncio.StreamWriter, request: dict):
+        # Every request is answered, otherwise the worker's call would wait forever.
+        try:
+            await self.client.wait_until_ready()
+
+            method = self.client.send if request['op'] == "SEND" else self.client.broadcast
+            result = await method(request['target'], request['payload'], request.get('nonce'))
+            frame = _pack(self._dumps, {"id": request['id'], "result": result})
+        except Exception as ex:
+            log.debug("Failed to forward %s from a worker: %r", request.get('op'), ex)
+            frame = _pack(self._dumps, {"id": request.get('id'), "error": f"{type(ex).__name__}: {ex}"})
+
+        # StreamWriter.is_closing is only available from Python 3.7.
+        if not writer.transport.is_closing():
+            writer.write(frame)
+
+
+class FanoutWorker:
+    """
+    Receives messages from a FanoutHub in another process on the same host.
+
+    Events are registered the same way as on Client: on_ready, on_raw_packet and on_error.
+    """
+
+    def __init__(self, path, *, loop=None):
+        self.path = path
+        self.loop = asyncio.get_event_loop() if loop is None else loop
+
+        self._writer = None
+        self._dumps = self._loads = None
+        self._requests = {}
+        self._request_id = 0
+
+    def event(self, coro):
+        """A decorator that registers an event to listen to."""
+        setattr(self, coro.__name__, coro)
+        log.debug('%s has successfully been registered as an event', coro.__name__)
+        return coro
+
+    # noinspection PyMethodMayBeStatic, PyUnusedLocal
+    def on_error(self, exc):
+        import traceback
+        traceback.print_exc()
+
+    async def on_raw_packet(self, message: Message):
+        """Called when the hub has passed a BROADCAST or SEND event to this worker."""
+
+    async def on_ready(self):
+        """Called when the worker has connected to the hub."""
+
+    async def send(self, target: [dict, Target], payload, nonce=None) -> bool:
+        """Sends through the hub's client. Returns False if it has been dropped by the rate limiter."""
+        return await self._request("SEND", target, payload, nonce)
+
+    async def broadcast(self, target: [dict, Target], payload, nonce=None) -> bool:
+        """Broadcasts through the hub's client. Returns False if it has been dropped by the rate limiter."""
+        return await self._request("BROADCAST", target, payload, nonce)
+
+    async def _request(self, op, target, payload, nonce) -> bool:
+        if self._writer is None:
+            raise WSClosed()
+
+        self._request_id += 1
+        request_id = self._request_id
+        future = self._requests[request_id] = self.loop.create_future()
+
+        try:
+            self._writer.write(_pack(self._dumps, {
+                "id": request_id,
+                "op": op,
+                "target": target if isinstance(target, dict) else target.as_dict(),
+                "payload": payload,
+                "nonce": nonce
+            }))
+            return await future
+        finally:
+            self._requests.pop(request_id, None)
+
+    def _resolve(self, response: dict):
+        future = self._requests.get(response['id'])
+        if future is None or future.done():
+            return
+
+        if 'error' in response:
+            future.set_exception(SingyeongException(response['error']))
+        else:
+            future.set_result(response['result'])
+
+    async def _call(self, f, *args):
+        try:
+            await maybe_coroutine(f, *args)
+        except Exception as ex:
+            await maybe_coroutine(self.on_error, ex)
+
+    async def connect(self):
+        """Processes messages from the hub until the connection is closed."""
+        reader, self._writer = await asyncio.open_unix_connection(self.path)
+
+        try:
+            self._dumps, self._loads = get_codec(Encoding((await _read_frame(reader)).decode()))
+            self.loop.create_task(self._call(self.on_ready))
+
+            while True:
+                data = self._loads(await _read_frame(reader))
+                if 'id' in data:  # Result of a send or broadcast.
+                    self._resolve(data)
+                else:
+                    self.loop.create_task(self._call(self.on_raw_packet, Message(**data)))
+        except asyncio.IncompleteReadError:
+            log.info("Hub has closed the connection.")
+        finally:
+            self._writer.close()
+            self._writer = None
+
+            for future in self._requests.values():
+                if not future.done():
+                    future.set_exception(WSClosed())
+
+    def run(self):
+        self.loop.run_until_complete(self.connect())
@@ -0,0 +1,109 @@
+import operator
+import random
+import weakref
+from typing import Optional
+
+from .types import VersionType
+
+# Clients created with loopback=True. Only clients running on the sender's loop are considered.
+_clients = weakref.WeakSet()
+
+_missing = object()
+
+_COMPARISONS = {
+    '$eq': operator.eq,
+    '$ne': operator.ne,
+    '$gt': operator.gt,
+    '$gte': operator.ge,
+    '$lt': operator.lt,
+    '$lte': operator.le,
+    '$in': lambda value, to: value in to,
+    '$contains': lambda value, to: to in value,
+    '$ncontains': lambda value, to: to not in value,
+}
+
+
+def register(client):
+    _clients.add(client)
+
+
+def unregister(client):
+    _clients.discard(client)
+
+
+def _resolve_path(metadata, path):
+    value = metadata
+    for part in path.strip('/').split('/'):
+        if isinstance(value, dict):
+            value = value.get(part, _missing)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _missing
+
+        if value is _missing:
+            break
+
+    return value
+
+
+def _version(value):
+    return tuple(int(part) if part.isdigit() else part for part in str(value).lstrip('v').split('.'))
+
+
+def evaluate(op: dict, metadata: dict) -> Optional[bool]:
+    """Evaluates a query operator against metadata. Returns None if it cannot be decided locally."""
+    key = op.get('op')
+
+    if key in ('$and', '$or', '$nor'):
+        results = [evaluate(arg, metadata) for arg in op.get('with', ())]
+        if None in results:
+            return None
+        if key == '$and':
+            return all(results)
+        if key == '$or':
+            return any(results)
+        return not any(results)
+
+    comparison = _COMPARISONS.get(key)
+    if comparison is None:
+        return None
+
+    value = _resolve_path(metadata, op['path'])
+    if value is _missing:
+        return None
+
+    to = op['to']
+    if to['type'] == "version":
+        value, to = _version(value), _version(to['value'])
+    else:
+        to = to['value']
+        if isinstance(value, VersionType):
+            value = str(value)
+
+    try:
+        return bool(comparison(value, to))
+    except TypeError:
+        return None
+
+
+def resolve(sender, target: dict):
+    """Returns a co-located client which the target resolves to, or None if the gateway has to route it."""
+    if 'key' in target or 'selector' in target:
+        return None  # Consistent hashing and selectors need the gateway's view of all clients.
+
+    application = target.get('application')
+    if application is None:
+        return None
+
+    ops = target.get('ops', ())
+    candidates = []
+
+    for client in list(_clients):
+        if client.loop is not sender.loop or client.dsn.login != application or client._closing:
+            continue
+
+        if all(evaluate(op, client._metadata) for op in ops):
+            candidates.append(client)
+
+    return random.choice(candidates) if candidates else None
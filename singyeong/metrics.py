@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from abc import ABCMeta, abstractmethod
+from typing import List, Optional, Union
+
+from .utils import maybe_coroutine
+
+log = logging.getLogger(__name__)
+
+
+class MetricProvider(metaclass=ABCMeta):
+    """Samples a single value which is published as metadata under ``name``."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def sample(self, client) -> Optional[Union[int, float]]:
+        """Returns the current value, or None to skip it. May be a coroutine."""
+        raise NotImplementedError
+
+
+class InflightHandlers(MetricProvider):
+    """Number of on_raw_packet handlers currently running."""
+
+    def __init__(self, name="inflight"):
+        super().__init__(name)
+
+    def sample(self, client):
+        return client.inflight
+
+
+class DispatchQueueDepth(MetricProvider):
+    """Number of outgoing frames waiting to be written to the socket."""
+
+    def __init__(self, name="queue_depth"):
+        super().__init__(name)
+
+    def sample(self, client):
+        return client.ws.scheduler.pending if client.ws else 0
+
+
+class LoopLag(MetricProvider):
+    """Event loop lag in milliseconds."""
+
+    def __init__(self, name="loop_lag"):
+        super().__init__(name)
+
+    async def sample(self, client):
+        if client.monitor is not None and client.monitor.running:
+            return round(client.monitor.lag * 1000, 3)
+
+        started = client.loop.time()
+        await asyncio.sleep(0)
+        return round((client.loop.time() - started) * 1000, 3)
+
+
+class CPUUsage(MetricProvider):
+    """CPU time used by the process since the previous sample, in percent of one core."""
+
+    def __init__(self, name="cpu"):
+        super().__init__(name)
+        self._last = (time.monotonic(), time.process_time())
+
+    def sample(self, client):
+        now = (time.monotonic(), time.process_time())
+        wall, cpu = now[0] - self._last[0], now[1] - self._last[1]
+        self._last = now
+        return round(cpu / wall * 100, 2) if wall > 0 else None
+
+
+class MemoryUsage(MetricProvider):
+    """Resident set size of the process in bytes (peak RSS where the current one is not available)."""
+
+    def __init__(self, name="rss"):
+        super().__init__(name)
+
+    def sample(self, client):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            pass
+
+        try:
+            import resource
+        except ImportError:
+            return None
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def default_providers() -> List[MetricProvider]:
+    return [InflightHandlers(), DispatchQueueDepth(), LoopLag(), CPUUsage(), MemoryUsage()]
+
+
+class MetricsPublisher:
+    """Publishes the values of metric providers through update_metadata every ``interval`` seconds."""
+
+    def __init__(self, client, providers: List[MetricProvider], *, interval=5.0):
+        self.client = client
+        self.providers = providers
+        self.interval = interval
+
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = self.client.loop.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def sample(self) -> dict:
+        values = {}
+        for provider in self.providers:
+            try:
+                value = await maybe_coroutine(provider.sample, self.client)
+            except Exception:
+                log.exception("Metric provider %s failed", provider.name)
+                continue
+
+            if value is not None:
+                values[provider.name] = value
+
+        return values
+
+    async def _run(self):
+        while True:
+            await self.client.wait_until_ready()
+
+            try:
+                await self.client.update_metadata(await self.sample())
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:  # Usually the connection is being re-established.
+                log.debug("Could not publish metrics: %r", ex)
+
+            await asyncio.sleep(self.interval)
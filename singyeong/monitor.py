@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from inspect import isawaitable as _isawaitable
+
+log = logging.getLogger(__name__)
+
+
+class HandlerStats:
+    __slots__ = ('calls', 'blocking', 'max_blocking', 'elapsed')
+
+    def __init__(self):
+        self.calls = 0
+        self.blocking = 0.0
+        self.max_blocking = 0.0
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return f"HandlerStats(" \
+               f"calls={self.calls!r}, " \
+               f"blocking={self.blocking!r}, " \
+               f"max_blocking={self.max_blocking!r}, " \
+               f"elapsed={self.elapsed!r}" \
+               f")"
+
+
+class _Timed:
+    """Drives an awaitable and adds up the time spent in its synchronous steps."""
+
+    def __init__(self, awaitable, monitor, name):
+        self._awaitable = awaitable
+        self._monitor = monitor
+        self._name = name
+        self.blocking = 0.0
+
+    def __await__(self):
+        iterator = self._awaitable.__await__()
+        value = exc = None
+
+        while True:
+            started = time.perf_counter()
+            self._monitor._step = (self._name, started)
+            try:
+                if exc is not None:
+                    yielded = iterator.throw(exc)
+                else:
+                    yielded = iterator.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._monitor._step = None
+                self.blocking += time.perf_counter() - started
+
+            try:
+                value, exc = (yield yielded), None
+            except BaseException as ex:
+                value, exc = None, ex
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and how long event handlers block the loop.
+
+    A watchdog thread logs the stack of the loop thread when a handler step, or the loop as a whole, has been
+    blocked for longer than ``threshold`` seconds.
+    """
+
+    def __init__(self, loop, *, threshold=0.1, interval=0.25):
+        # The watchdog polls every threshold / 4 and the sampler sleeps for interval, zero would make them spin.
+        if threshold <= 0 or interval <= 0:
+            raise ValueError("Threshold and interval must be positive")
+
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.handlers = {}
+
+        self._step = None
+        self._tick = time.perf_counter()
+        self._thread_id = None
+        self._task = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        """Starts sampling. Has to be called from the event loop thread."""
+        if self._task is not None:
+            return
+
+        self._thread_id = threading.get_ident()
+        self._tick = time.perf_counter()
+        self._stopped.clear()
+        self._task = self.loop.create_task(self._sample())
+        threading.Thread(target=self._watch, name="singyeong-loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def call(self, f, *args, **kwargs):
+        """Calls a handler like maybe_coroutine, recording its timings."""
+        name = getattr(f, '__qualname__', repr(f))
+        started = time.perf_counter()
+
+        self._step = (name, started)
+        try:
+            value = f(*args, **kwargs)
+        finally:
+            self._step = None
+            blocking = time.perf_counter() - started
+
+        try:
+            if _isawaitable(value):
+                timed = _Timed(value, self, name)
+                try:
+                    value = await timed
+                finally:
+                    blocking += timed.blocking
+        finally:
+            self._record(name, blocking, time.perf_counter() - started)
+
+        return value
+
+    def _record(self, name, blocking, elapsed):
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+
+        stats.calls += 1
+        stats.blocking += blocking
+        stats.elapsed += elapsed
+        stats.max_blocking = max(stats.max_blocking, blocking)
+
+        if blocking > self.threshold:
+            log.warning("Handler %s blocked the event loop for %.3fs", name, blocking)
+
+    async def _sample(self):
+        while True:
+            started = self.loop.time()
+            await asyncio.sleep(self.interval)
+
+            self.lag = max(self.loop.time() - started - self.interval, 0.0)
+            self.max_lag = max(self.max_lag, self.lag)
+            self._tick = time.perf_counter()
+
+            if self.lag > self.threshold:
+                log.warning("Event loop lag is %.3fs", self.lag)
+
+    def _watch(self):
+        reported = None
+
+        while not self._stopped.wait(self.threshold / 4):
+            now = time.perf_counter()
+            step = self._step
+
+            if step is not None and now - step[1] > self.threshold:
+                name, started = step
+                blocked = now - started
+            elif now - self._tick > self.interval + self.threshold:
+                name, started = None, self._tick
+                blocked = now - started - self.interval
+            else:
+                continue
+
+            if started == reported:
+                continue
+            reported = started
+
+            frame = sys._current_frames().get(self._thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+            log.warning("Event loop blocked for %.3fs%s, stack:\n%s",
+                        blocked, f" in handler {name}" if name else "", stack)
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the stack of a thread (the calling one by default).
+
+    ``dump()`` writes the samples in collapsed stack format, which can be rendered by flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, *, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.samples = Counter()
+
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="singyeong-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            self.samples[';'.join(reversed(names))] += 1
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple, Union
+
+from .enums import RateLimitPolicy
+
+log = logging.getLogger(__name__)
+
+Limit = Union[float, Tuple[float, float]]
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', '_tokens', '_updated')
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+
+        self.rate = rate
+        self.capacity = max(rate if capacity is None else capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def from_limit(cls, limit: Limit):
+        if isinstance(limit, tuple):
+            return cls(*limit)
+        return cls(limit)
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available, 0 if there is one right now."""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def consume(self):
+        self._tokens -= 1
+
+
+class RateLimiter:
+    """
+    Token bucket limits for outgoing messages.
+
+    Every limit is either a rate in messages per second or a ``(rate, burst)`` tuple. ``application`` is applied
+    separately to every target application, ``events`` maps event names ("SEND", "BROADCAST") to their limit.
+    """
+
+    def __init__(
+            self, *,
+            total: Optional[Limit] = None,
+            application: Optional[Limit] = None,
+            events: Optional[Dict[str, Limit]] = None,
+            policy: RateLimitPolicy = RateLimitPolicy.WAIT
+    ):
+        self.policy = RateLimitPolicy(policy)
+
+        self._total = None if total is None else TokenBucket.from_limit(total)
+        self._application = application
+        self._applications = {}
+        self._events = {event: TokenBucket.from_limit(limit) for event, limit in (events or {}).items()}
+
+    def _buckets(self, event, application):
+        buckets = []
+
+        if self._total is not None:
+            buckets.append(self._total)
+
+        if self._application is not None and application is not None:
+            bucket = self._applications.get(application)
+            if bucket is None:
+                bucket = self._applications[application] = TokenBucket.from_limit(self._application)
+            buckets.append(bucket)
+
+        bucket = self._events.get(event)
+        if bucket is not None:
+            buckets.append(bucket)
+
+        return buckets
+
+    async def acquire(self, event: str, application: Optional[str] = None, droppable: bool = False) -> bool:
+        """Takes a token from every matching bucket. Returns False if the message should be dropped."""
+        buckets = self._buckets(event, application)
+
+        while True:
+            now = time.monotonic()
+            delay = max([bucket.delay(now) for bucket in buckets], default=0)
+
+            if not delay:
+                for bucket in buckets:
+                    bucket.consume()
+                return True
+
+            if self.policy == RateLimitPolicy.DROP or (self.policy == RateLimitPolicy.DROP_DROPPABLE and droppable):
+                log.debug("Dropping %s to %s, rate limited for %.3fs", event, application, delay)
+                return False
+
+            await asyncio.sleep(delay)
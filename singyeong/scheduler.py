@@ -0,0 +1,165 @@
+import asyncio
+from collections import deque
+
+from .enums import Lane
+from .exceptions import WSClosed
+
+DEFAULT_WEIGHTS = {Lane.SEND: 3, Lane.BROADCAST: 1}
+DEFAULT_BUDGETS = {Lane.SEND: 8 << 20, Lane.BROADCAST: 8 << 20}
+QUANTUM = 16 << 10
+
+
+class _Frame:
+    __slots__ = ('data', 'size', 'future')
+
+    def __init__(self, data, size, future):
+        self.data = data
+        self.size = size
+        self.future = future
+
+
+class OutboundScheduler:
+    """
+    Orders outbound frames by lane before they reach the websocket.
+
+    CONTROL frames (heartbeats, identify) always go first, then METADATA. The bulk lanes (SEND, BROADCAST) share
+    the remaining bandwidth by deficit round robin, weighted by ``weights``. ``budgets`` caps the number of bytes
+    queued per bulk lane; producers wait until the lane drains below its budget.
+    """
+
+    def __init__(self, send, *, loop, weights=None, budgets=None, quantum=QUANTUM):
+        self._send = send
+        self.loop = loop
+        self.quantum = quantum
+
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+
+        self._bulk = [Lane.SEND, Lane.BROADCAST]
+        if any(self.weights.get(lane, 0) <= 0 for lane in self._bulk):
+            raise ValueError("Bulk lane weights must be positive")
+
+        self._queues = {lane: deque() for lane in Lane}
+        self._queued = {lane: 0 for lane in Lane}
+        self._drained = {lane: asyncio.Event() for lane in Lane}
+        self._deficit = {lane: 0 for lane in self._bulk}
+        self._cursor = 0
+        self._in_turn = False
+
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._current = None
+        self._closed = None
+
+    @property
+    def pending(self):
+        """Number of frames waiting to be written"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def put(self, lane: Lane, data):
+        """Queues a frame and waits until it has been written to the socket."""
+        size = len(data)
+        budget = self.budgets.get(lane)
+
+        # A single frame larger than the budget is still let through once the lane is empty.
+        while budget is not None and self._queued[lane] and self._queued[lane] + size > budget:
+            self._drained[lane].clear()
+            await self._drained[lane].wait()
+
+        if self._closed is not None:
+            raise self._closed
+
+        future = self.loop.create_future()
+        self._queues[lane].append(_Frame(data, size, future))
+        self._queued[lane] += size
+        self._wakeup.set()
+
+        if self._task is None:
+            self._task = self.loop.create_task(self._run())
+
+        await future
+
+    def close(self, exc=None):
+        """Fails the frame being written and every queued one with ``exc`` (WSClosed by default)."""
+        exc = WSClosed() if exc is None else exc
+        self._closed = exc
+
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+        frames = [] if self._current is None else [self._current]
+        self._current = None
+
+        for lane, queue in self._queues.items():
+            frames.extend(queue)
+            queue.clear()
+            self._queued[lane] = 0
+            self._drained[lane].set()
+
+        for frame in frames:
+            if not frame.future.done():
+                frame.future.set_exception(exc)
+
+    def _pop(self, lane):
+        frame = self._queues[lane].popleft()
+        self._queued[lane] -= frame.size
+        self._drained[lane].set()
+        return frame
+
+    def _next(self):
+        for lane in (Lane.CONTROL, Lane.METADATA):
+            if self._queues[lane]:
+                return self._pop(lane)
+
+        if not any(self._queues[lane] for lane in self._bulk):
+            return None
+
+        while True:
+            lane = self._bulk[self._cursor]
+            queue = self._queues[lane]
+
+            if queue:
+                if not self._in_turn:
+                    self._deficit[lane] += self.quantum * self.weights[lane]
+                    self._in_turn = True
+
+                if queue[0].size <= self._deficit[lane]:
+                    self._deficit[lane] -= queue[0].size
+                    return self._pop(lane)
+            else:
+                self._deficit[lane] = 0
+
+            self._in_turn = False
+            self._cursor = (self._cursor + 1) % len(self._bulk)
+
+    async def _run(self):
+        while True:
+            frame = self._next()
+
+            if frame is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if frame.future.done():  # Producer has been cancelled.
+                continue
+
+            self._current = frame
+            try:
+                await self._send(frame.data)
+            except asyncio.CancelledError:
+                # Only close() cancels the writer, and it has already failed the frame.
+                if not frame.future.done():
+                    frame.future.set_exception(self._closed or WSClosed())
+                raise
+            except Exception as ex:
+                if not frame.future.done():
+                    frame.future.set_exception(ex)
+            else:
+                if not frame.future.done():
+                    frame.future.set_result(None)
+            finally:
+                self._current = None
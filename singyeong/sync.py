@@ -0,0 +1,198 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections import deque
+from functools import partial
+
+from .client import Client, _cancel_tasks
+from .message import Message
+from .query import Target
+
+log = logging.getLogger(__name__)
+
+
+def _copy_result(future: concurrent.futures.Future, task: asyncio.Task):
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+class SyncClient:
+    """
+    Runs a Client on a background event loop thread, for threaded or synchronous code.
+
+    ``send``, ``broadcast`` and ``update_metadata`` may be called from any thread and return a
+    concurrent.futures.Future; they run once the client is ready. Calls are appended to a deque and handed to the
+    loop in batches, with one wakeup per batch. Events are registered like on Client, but with plain functions,
+    which are run in a thread pool of ``workers`` threads. Other keyword arguments are passed to Client.
+    """
+
+    def __init__(self, dsn, *, workers=4, **kwargs):
+        self.dsn = dsn
+        self.client = None
+
+        self._kwargs = kwargs
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="singyeong-handler")
+        self._queue = deque()
+        self._scheduled = False
+        self._closed = False
+        self._loop = None
+        self._thread = None
+        self._started = threading.Event()
+        self._ready = threading.Event()
+        self._start_error = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def event(self, func):
+        """A decorator that registers an event to listen to."""
+        setattr(self, func.__name__, func)
+        log.debug('%s has successfully been registered as an event', func.__name__)
+        return func
+
+    # noinspection PyMethodMayBeStatic, PyUnusedLocal
+    def on_error(self, exc):
+        import traceback
+        traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+    def on_raw_packet(self, message: Message):
+        """Called in a handler thread when the 신경 has sent to you BROADCAST or SEND event."""
+
+    def on_ready(self):
+        """Called in a handler thread when the 신경 has accepted you."""
+
+    @property
+    def latency(self):
+        """Gateway latency in milliseconds"""
+        return self.client.latency if self.client else float("infinity")
+
+    def start(self):
+        """Starts the event loop thread and connects. Returns once the client has been created."""
+        if self._closed:
+            raise RuntimeError("SyncClient has been closed")
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="singyeong-loop", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+        if self._start_error is not None:
+            self._thread = None
+            raise self._start_error
+
+    def close(self, timeout=None):
+        """Disconnects and stops the event loop thread. Calls which have not been handed to the loop fail."""
+        if self._thread is None:
+            return
+
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self._executor.shutdown(wait=False)
+
+        # Nothing drains the queue anymore; submissions racing with close() are failed here as well.
+        while self._queue:
+            future, _, _ = self._queue.popleft()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("SyncClient has been closed"))
+
+    def wait_until_ready(self, timeout=None) -> bool:
+        return self._ready.wait(timeout)
+
+    def send(self, target: [dict, Target], payload, nonce=None) -> concurrent.futures.Future:
+        return self._submit("send", target, payload, nonce)
+
+    def broadcast(self, target: [dict, Target], payload, nonce=None) -> concurrent.futures.Future:
+        return self._submit("broadcast", target, payload, nonce)
+
+    def update_metadata(self, md) -> concurrent.futures.Future:
+        return self._submit("update_metadata", md)
+
+    def _submit(self, method, *args) -> concurrent.futures.Future:
+        if self._closed:
+            raise RuntimeError("SyncClient has been closed")
+        if self._loop is None:
+            raise RuntimeError("SyncClient has not been started")
+
+        future = concurrent.futures.Future()
+        self._queue.append((future, method, args))
+
+        # Only the first call after a drain wakes the loop up; deque appends need no lock.
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._drain)
+
+        return future
+
+    def _drain(self):
+        # Reset before draining, so calls appended after the last popleft schedule a new drain.
+        self._scheduled = False
+        queue = self._queue
+
+        while queue:
+            future, method, args = queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            task = self._loop.create_task(self._call_when_ready(method, args))
+            task.add_done_callback(partial(_copy_result, future))
+
+    async def _call_when_ready(self, method, args):
+        # Calls made right after start(), or while reconnecting, wait for READY instead of failing on a missing socket.
+        await self.client.wait_until_ready()
+        return await getattr(self.client, method)(*args)
+
+    def _call(self, handler, *args):
+        try:
+            handler(*args)
+        except Exception as ex:
+            try:
+                self.on_error(ex)
+            except Exception:
+                log.exception("Error in on_error")
+
+    def _on_error(self, exc):
+        self._executor.submit(self._call, self.on_error, exc)
+
+    def _on_raw_packet(self, message):
+        self._executor.submit(self._call, self.on_raw_packet, message)
+
+    def _on_ready(self):
+        self._ready.set()
+        self._executor.submit(self._call, self.on_ready)
+
+    def _run(self):
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        try:
+            self.client = Client(self.dsn, loop=loop, **self._kwargs)
+            self.client.on_raw_packet = self._on_raw_packet
+            self.client.on_ready = self._on_ready
+            self.client.on_error = self._on_error
+            loop.create_task(self.client.connect())
+        except Exception as ex:
+            self._start_error = ex
+            loop.close()
+            return
+        finally:
+            self._started.set()
+
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self.client._close())
+            _cancel_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
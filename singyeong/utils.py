@@ -1,4 +1,3 @@
-import asyncio
 from inspect import isawaitable as _isawaitable
 
 from .types import VersionType
@@ -6,21 +6,15 @@ from typing import Union
 
 import websockets
 
+from . import chunking
+from .chunking import CHUNK_KEY, Chunk, Reassembler
+from .codec import get_codec
+from .enums import Encoding, Lane, OpCode
+from .exceptions import WSClosed
 from .message import Message
+from .scheduler import OutboundScheduler
 from .utils import create_task
 
-try:
-    import msgpack
-except ImportError:
-    msgpack = None
-
-try:
-    import ujson as json
-except ImportError:
-    import json
-
-from .enums import Encoding, OpCode
-
 log = logging.getLogger(__name__)
 
 
@@ -33,12 +27,26 @@ class SingyeongSocket(websockets.WebSocketClientProtocol):
         self.on_ready = kwargs.pop("on_ready", lambda: ...)
         self.on_message = kwargs.pop("on_message", lambda _: ...)
         self.on_error = kwargs.pop("on_error", lambda _: ...)
+        self.on_chunk = kwargs.pop("on_chunk", None)
+        self.chunk_threshold = kwargs.pop("chunk_threshold", None)
+        self.chunk_size = kwargs.pop("chunk_size", None)
+        self.reassembler = kwargs.pop("reassembler", None) or Reassembler()
+        self.dedup = kwargs.pop("dedup", None)
+        self.capture = kwargs.pop("capture", None)
+        self.standby = kwargs.pop("standby", False)
+        lane_weights = kwargs.pop("lane_weights", None)
+        lane_budgets = kwargs.pop("lane_budgets", None)
+
+        self._dumps, self._loads = get_codec(self.encoding)
 
         self.heartbeat_interval_task = None
         super().__init__(**kwargs)
 
+        self.scheduler = OutboundScheduler(self.send, loop=self.loop, weights=lane_weights, budgets=lane_budgets)
+
         self._last_heartbeat = None
         self._latency = None
+        self._heartbeat_interval = None
 
     async def close_connection(self):
         await super().close_connection()
@@ -46,6 +54,8 @@ class SingyeongSocket(websockets.WebSocketClientProtocol):
         if self.heartbeat_interval_task:
             self.heartbeat_interval_task.cancel()
 
+        self.scheduler.close(WSClosed())
+
     @property
     def latency(self):
         """Gateway latency in milliseconds"""
@@ -63,29 +73,89 @@ class SingyeongSocket(websockets.WebSocketClientProtocol):
             await asyncio.sleep(sleep)
 
     @classmethod
-    async def from_client(cls, client):
-
-        def create_protocol(**kwargs):
-            return cls(
-                on_error=client.on_error,
-                on_ready=client._on_ready,
-                on_message=client._on_raw_packet,
-                encoding=client.dsn.encoding,
-                auth=(client.dsn.login, client.dsn.password),
-                namespace=client.namespace,
-                **kwargs
-            )
+    def for_client(cls, client, **kwargs):
+        return cls(
+            on_error=client.on_error,
+            on_ready=client._on_ready,
+            on_message=client._on_raw_packet,
+            on_chunk=client._on_chunk if client.stream_chunks else None,
+            chunk_threshold=client.chunk_threshold,
+            chunk_size=client.chunk_size,
+            reassembler=client._reassembler,
+            dedup=client._dedup,
+            capture=client._capture,
+            encoding=client.dsn.encoding,
+            auth=(client.dsn.login, client.dsn.password),
+            namespace=client.namespace,
+            lane_weights=client.lane_weights,
+            lane_budgets=client.lane_budgets,
+            **kwargs
+        )
+
+    @classmethod
+    async def from_client(cls, client, *, standby=False, **kwargs):
+        """
+        Connects to the gateway of the client. Keyword arguments are passed to websockets.connect,
+        e.g. ``host`` and ``ssl`` to connect to a resolved address with a shared SSL context.
+        """
+
+        def create_protocol(**protocol_kwargs):
+            return cls.for_client(client, standby=standby, **protocol_kwargs)
 
         return await websockets.connect(
             f"ws{'s' if client.dsn.encryption else ''}://{client.dsn.host}:{client.dsn.port}/gateway/websocket"
             f"?encoding={client.dsn.encoding.value}",
             loop=client.loop,
-            create_protocol=create_protocol
+            create_protocol=create_protocol,
+            **kwargs
         )
 
+    @property
+    def warm(self):
+        """Whether a standby socket has received HELLO and can be activated"""
+        return self.standby and self._heartbeat_interval is not None and self.open
+
+    async def activate(self):
+        """Identifies a standby socket, which then behaves like a freshly connected one."""
+        if not self.standby:
+            return
+
+        self.standby = False
+        await self._identify()
+
+    async def _identify(self):
+        if self.heartbeat_interval_task:
+            self.heartbeat_interval_task.cancel()
+
+        self.heartbeat_interval_task = self.loop.create_task(self.heartbeat(self._heartbeat_interval))
+
+        response = {
+            "client_id": f'{self.client_id}',
+            "application_id": self.auth[0],
+        }
+
+        if self.auth[1]:
+            response['auth'] = self.auth[1]
+
+        if self.namespace:
+            response['namespace'] = self.namespace
+
+        await self.send_json({
+            "op": OpCode.IDENTIFY,
+            "d": response
+        })
+
     async def poll_event(self):
         encoded_data: websockets.Data = await self.recv()
 
+        if self.capture is not None:
+            try:
+                self.capture.write(encoded_data)
+            except (OSError, ValueError) as ex:  # ValueError if the file has been closed.
+                # A capture problem must not look like a connection failure to Client.connect.
+                log.error("Could not write to the capture file, disabling capture on this connection: %r", ex)
+                self.capture = None
+
         try:
             data = self._decode(encoded_data)
             assert isinstance(data, dict)
@@ -93,29 +163,11 @@ class SingyeongSocket(websockets.WebSocketClientProtocol):
             op = OpCode(data['op'])
 
             if op == OpCode.HELLO:
+                self._heartbeat_interval = int(data['d']['heartbeat_interval']) / 1000
 
-                if self.heartbeat_interval_task:
-                    self.heartbeat_interval_task.cancel()
-
-                self.heartbeat_interval_task = self.loop.create_task(self.heartbeat(
-                    int(data['d']['heartbeat_interval']) / 1000
-                ))
-
-                response = {
-                    "client_id": f'{self.client_id}',
-                    "application_id": self.auth[0],
-                }
-
-                if self.auth[1]:
-                    response['auth'] = self.auth[1]
-
-                if self.namespace:
-                    response['namespace'] = self.namespace
-
-                await self.send_json({
-                    "op": OpCode.IDENTIFY,
-                    "d": response
-                })
+                # A standby socket identifies only once it is activated.
+                if not self.standby:
+                    await self._identify()
                 return
 
             if op == OpCode.READY:
@@ -138,32 +190,88 @@ class SingyeongSocket(websockets.WebSocketClientProtocol):
     def handle_dispatch(self, data):
         if data['t'] in ("SEND", "BROADCAST"):
             payload = data['d']
+            body = payload['payload']
+            nonce = payload.get('nonce')
+
+            if isinstance(body, dict) and CHUNK_KEY in body:
+                chunk = Chunk.from_envelope(body[CHUNK_KEY], timestamp=data['ts'], event_name=data['t'])
+
+                if self.on_chunk is not None:
+                    create_task(self.loop, self.on_chunk, chunk)
+                    return
+
+                joined = self.reassembler.feed(chunk)
+                if joined is None:
+                    return
+
+                # Chunks carry the sender's encoding, which may differ from this connection's.
+                body = get_codec(Encoding(chunk.encoding))[1](joined)
+                nonce = chunk.nonce
+
+            if nonce is not None and self.dedup is not None and self.dedup.seen(nonce):
+                log.debug("Dropping duplicate %s with nonce %r", data['t'], nonce)
+                return
 
             create_task(
                 self.loop,
                 self.on_message,
                 Message(
-                    nonce=payload.get('nonce'),
-                    payload=payload['payload'],
+                    nonce=nonce,
+                    payload=body,
                     timestamp=data['ts'],
                     event_name=data['t']
                 )
             )
 
-    async def send_json(self, data) -> None:
+    async def send_json(self, data, lane: Lane = None) -> None:
         encoded_data = self._encode(data)
-        await self.send(encoded_data)
+        lane = _lane_for(data) if lane is None else lane
+
+        if self.chunk_threshold is not None and len(encoded_data) > self.chunk_threshold \
+                and lane in (Lane.SEND, Lane.BROADCAST) \
+                and not (data['t'] == "SEND" and 'selector' in data['d']['target']):
+            # Only oversized frames pay for encoding the payload a second time, to slice the chunks from it.
+            await self._send_chunked(data, lane, self._dumps(data['d']['payload']))
+            return
+
+        await self.scheduler.put(lane, encoded_data)
+
+    async def _send_chunked(self, data, lane: Lane, encoded_payload) -> None:
+        dispatch = data['d']
+        chunk_id = chunking.new_id()
+        target = dict(dispatch['target'])
+
+        if data['t'] == "SEND":
+            # Consistent hashing on the chunk id routes every chunk to the same receiver. Selectors would pick a
+            # receiver per chunk, so targets with one are never chunked.
+            target.setdefault('key', chunk_id)
+
+        log.debug("Sending %d bytes in chunks of %d (%s)", len(encoded_payload), self.chunk_size, chunk_id)
+
+        # Every chunk is queued separately, so other frames are interleaved between them.
+        for envelope in chunking.split(encoded_payload, self.chunk_size, chunk_id=chunk_id,
+                                       encoding=self.encoding.value, nonce=dispatch.get('nonce')):
+            await self.scheduler.put(lane, self._encode({
+                "op": data['op'],
+                "t": data['t'],
+                "d": {
+                    "target": target,
+                    "payload": envelope
+                }
+            }))
 
     def _encode(self, data: websockets.Data) -> Union[bytes, str]:
-        if self.encoding == Encoding.JSON:
-            return json.dumps(data)
-        if self.encoding == Encoding.MSGPACK:
-            return msgpack.packb(data)
-        raise RuntimeError
+        return self._dumps(data)
 
     def _decode(self, data: websockets.Data) -> Union[dict, list]:
-        if self.encoding == Encoding.JSON:
-            return json.loads(data)
-        if self.encoding == Encoding.MSGPACK:
-            return msgpack.unpackb(data)
-        raise RuntimeError
+        return self._loads(data)
+
+
+def _lane_for(data) -> Lane:
+    if data['op'] != OpCode.DISPATCH:
+        return Lane.CONTROL
+    if data['t'] == "UPDATE_METADATA":
+        return Lane.METADATA
+    if data['t'] == "BROADCAST":
+        return Lane.BROADCAST
+    return Lane.SEND
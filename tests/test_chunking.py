@@ -0,0 +1,174 @@
+import asyncio
+import json
+
+from singyeong import chunking
+from singyeong.chunking import CHUNK_KEY, Chunk, Reassembler
+from singyeong.enums import Encoding, Lane, OpCode
+from singyeong.websocket import SingyeongSocket
+
+
+def chunks_of(encoded, size, *, chunk_id="c1", encoding="json", nonce=None):
+    return [
+        Chunk.from_envelope(envelope[CHUNK_KEY], timestamp=0, event_name="SEND")
+        for envelope in chunking.split(encoded, size, chunk_id=chunk_id, encoding=encoding, nonce=nonce)
+    ]
+
+
+def test_split_covers_payload():
+    envelopes = list(chunking.split("abcdefghij", 4, chunk_id="c1", encoding="json", nonce="n"))
+
+    assert [envelope[CHUNK_KEY]['data'] for envelope in envelopes] == ["abcd", "efgh", "ij"]
+    assert [envelope[CHUNK_KEY]['seq'] for envelope in envelopes] == [0, 1, 2]
+    assert all(envelope[CHUNK_KEY]['total'] == 3 for envelope in envelopes)
+    assert all(envelope[CHUNK_KEY]['nonce'] == "n" for envelope in envelopes)
+    assert all(envelope[CHUNK_KEY]['encoding'] == "json" for envelope in envelopes)
+
+
+def test_split_omits_missing_nonce():
+    envelope, = chunking.split("abc", 4, chunk_id="c1", encoding="json")
+    assert 'nonce' not in envelope[CHUNK_KEY]
+
+
+def test_envelope_without_encoding_is_json():
+    chunk = Chunk.from_envelope({"id": "c1", "seq": "0", "total": "1", "data": "x"}, timestamp=0, event_name="SEND")
+    assert (chunk.seq, chunk.total, chunk.encoding) == (0, 1, "json")
+
+
+def test_reassembles_out_of_order_text():
+    reassembler = Reassembler()
+    chunks = chunks_of("abcdefghij", 3)
+
+    assert [reassembler.feed(chunk) for chunk in reversed(chunks[1:])] == [None, None, None]
+    assert reassembler.feed(chunks[0]) == "abcdefghij"
+    assert len(reassembler) == 0
+
+
+def test_reassembles_bytes():
+    reassembler = Reassembler()
+    encoded = bytes(range(256)) * 10
+    results = [reassembler.feed(chunk) for chunk in chunks_of(encoded, 100, encoding="msgpack")]
+
+    assert results[-1] == encoded
+    assert isinstance(results[-1], bytes)
+
+
+def test_duplicate_seq_is_ignored():
+    reassembler = Reassembler()
+    first, second = chunks_of("abcdef", 3)
+
+    assert reassembler.feed(first) is None
+    assert reassembler.feed(first) is None
+    assert reassembler._size == 3
+    assert reassembler.feed(second) == "abcdef"
+
+
+def test_mismatched_total_and_invalid_seq_are_dropped():
+    reassembler = Reassembler()
+    first, _ = chunks_of("abcdef", 3)
+    reassembler.feed(first)
+
+    assert reassembler.feed(Chunk.from_envelope(
+        {"id": "c1", "seq": 1, "total": 5, "data": "x"}, timestamp=0, event_name="SEND"
+    )) is None
+    assert reassembler.feed(Chunk.from_envelope(
+        {"id": "c2", "seq": 3, "total": 3, "data": "x"}, timestamp=0, event_name="SEND"
+    )) is None
+    assert len(reassembler) == 1
+
+
+def test_oldest_partial_is_dropped_over_byte_bound():
+    reassembler = Reassembler(max_bytes=10)
+    old = chunks_of("a" * 12, 6, chunk_id="old")
+    new = chunks_of("b" * 12, 6, chunk_id="new")
+
+    reassembler.feed(old[0])
+    reassembler.feed(new[0])  # 12 bytes buffered, "old" goes.
+
+    assert list(reassembler._partials) == ["new"]
+    assert reassembler._size == 6
+    assert reassembler.feed(new[1]) == "b" * 12
+    assert reassembler._size == 0
+
+
+def test_partials_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(chunking.time, "monotonic", lambda: now[0])
+
+    reassembler = Reassembler(timeout=5.0)
+    first, second = chunks_of("abcdef", 3)
+    reassembler.feed(first)
+
+    now[0] += 6.0
+    # The first chunk has expired, so the second one starts a new partial payload.
+    assert reassembler.feed(second) is None
+    assert len(reassembler) == 1
+    assert reassembler._size == 3
+
+
+class _Scheduler:
+    def __init__(self):
+        self.frames = []
+
+    async def put(self, lane, data):
+        self.frames.append((lane, data))
+
+
+class _Socket:
+    """Just the attributes send_json and _send_chunked use, without opening a connection."""
+
+    encoding = Encoding.JSON
+
+    def __init__(self, threshold, size=8):
+        self.chunk_threshold = threshold
+        self.chunk_size = size
+        self.scheduler = _Scheduler()
+        self.encodes = 0
+
+    def _dumps(self, data):
+        self.encodes += 1
+        return json.dumps(data)
+
+    def _encode(self, data):
+        return self._dumps(data)
+
+    send_json = SingyeongSocket.send_json
+    _send_chunked = SingyeongSocket._send_chunked
+
+
+def dispatch(event, target, payload):
+    return {"op": OpCode.DISPATCH, "t": event, "d": {"target": target, "payload": payload}}
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_small_frames_are_encoded_once():
+    socket = _Socket(1000)
+    run(socket.send_json(dispatch("SEND", {"application": "app"}, {"x": 1})))
+
+    assert socket.encodes == 1
+    assert len(socket.scheduler.frames) == 1
+
+
+def test_large_frames_are_chunked_with_a_pinned_key():
+    socket = _Socket(20)
+    payload = {"x": "y" * 50}
+    run(socket.send_json(dispatch("SEND", {"application": "app"}, payload)))
+
+    frames = [json.loads(data) for _, data in socket.scheduler.frames]
+    assert len(frames) > 1
+    assert {frame['d']['target']['key'] for frame in frames} == {frames[0]['d']['payload'][CHUNK_KEY]['id']}
+    assert "".join(frame['d']['payload'][CHUNK_KEY]['data'] for frame in frames) == json.dumps(payload)
+    assert {lane for lane, _ in socket.scheduler.frames} == {Lane.SEND}
+
+
+def test_send_with_selector_is_not_chunked():
+    socket = _Socket(20)
+    run(socket.send_json(dispatch("SEND", {"application": "app", "selector": {"$min": "/load"}}, {"x": "y" * 50})))
+
+    assert len(socket.scheduler.frames) == 1
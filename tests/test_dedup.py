@@ -0,0 +1,98 @@
+import pytest
+
+from singyeong import dedup, websocket
+from singyeong.dedup import NonceCache
+from singyeong.websocket import SingyeongSocket
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dedup.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_duplicates_within_ttl(clock):
+    cache = NonceCache(ttl=10.0)
+
+    assert not cache.seen("a")
+    clock.now += 9.9
+    assert cache.seen("a")
+    assert "a" in cache
+
+
+def test_nonces_expire_after_ttl(clock):
+    cache = NonceCache(ttl=10.0)
+    cache.seen("a")
+    clock.now += 5.0
+    cache.seen("b")
+
+    clock.now += 5.0
+    assert "a" not in cache
+    assert not cache.seen("a")  # Seen again after expiry, remembered anew.
+    assert len(cache) == 2  # "a" was purged before being stored again, "b" is still valid.
+
+
+def test_oldest_nonce_is_evicted_over_maxsize(clock):
+    cache = NonceCache(maxsize=3)
+    for nonce in "abc":
+        cache.seen(nonce)
+        clock.now += 1
+
+    assert cache.seen("a")  # A duplicate does not refresh its position.
+    assert not cache.seen("d")
+
+    assert len(cache) == 3
+    assert "a" not in cache
+    assert all(nonce in cache for nonce in "bcd")
+
+
+def test_unhashable_nonces_are_not_tracked(clock):
+    cache = NonceCache()
+
+    assert not cache.seen(["a"])
+    assert not cache.seen(["a"])
+    assert not cache.seen({"a": 1})
+    assert len(cache) == 0
+
+
+class _Socket:
+    """Just the attributes handle_dispatch uses, without opening a connection."""
+
+    loop = None
+    on_chunk = None
+    reassembler = None
+
+    def __init__(self, cache):
+        self.dedup = cache
+
+    @staticmethod
+    def on_message(message):
+        pass
+
+    handle_dispatch = SingyeongSocket.handle_dispatch
+
+
+def test_duplicate_dispatch_creates_no_task(clock, monkeypatch):
+    tasks = []
+    monkeypatch.setattr(websocket, "create_task", lambda loop, func, *args: tasks.append(args))
+    socket = _Socket(NonceCache())
+
+    def dispatch(nonce):
+        socket.handle_dispatch({"t": "SEND", "ts": 0, "d": {"payload": {"x": 1}, "nonce": nonce}})
+
+    dispatch("a")
+    dispatch("a")
+    dispatch("b")
+    dispatch(None)
+    dispatch(None)
+
+    assert [message.nonce for message, in tasks] == ["a", "b", None, None]
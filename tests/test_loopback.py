@@ -0,0 +1,132 @@
+import types
+import weakref
+
+import pytest
+
+from singyeong import loopback
+from singyeong.loopback import evaluate, resolve
+from singyeong.query import Contains, Equal, GreaterThan, In, LessThanEqual, NotContains, NotEqual, Target
+from singyeong.types import VersionType
+
+METADATA = {
+    "region": "eu",
+    "load": 3,
+    "tags": ["a", "b"],
+    "version": "1.10.0",
+    "nested": {"shards": [4, 7]},
+}
+
+
+@pytest.mark.parametrize("op, expected", [
+    (Equal("/region", "eu"), True),
+    (NotEqual("/region", "eu"), False),
+    (GreaterThan("/load", 2), True),
+    (LessThanEqual("/load", 2), False),
+    (In("/region", ["us", "eu"]), True),
+    (In("/region", ["us"]), False),
+    (Contains("/tags", "a"), True),
+    (NotContains("/tags", "a"), False),
+    (Equal("/nested/shards/1", 7), True),
+    (GreaterThan("/version", VersionType("1.9.0")), True),
+    (LessThanEqual("/version", VersionType("1.9.9")), False),
+])
+def test_comparisons(op, expected):
+    assert evaluate(op.as_dict(), METADATA) is expected
+
+
+@pytest.mark.parametrize("op", [
+    Equal("/missing", 1),
+    Equal("/nested/missing", 1),
+    Equal("/nested/shards/5", 1),
+    Equal("/region/deeper", 1),
+    GreaterThan("/region", 1),  # str > int cannot be compared.
+])
+def test_undecidable_comparisons_return_none(op):
+    assert evaluate(op.as_dict(), METADATA) is None
+
+
+def test_unknown_operator_returns_none():
+    assert evaluate({"op": "$regex", "path": "/region", "to": {"type": "string", "value": "e."}}, METADATA) is None
+
+
+def logical(key, *ops):
+    return {"op": key, "with": [op if isinstance(op, dict) else op.as_dict() for op in ops]}
+
+
+def test_logical_operators():
+    true, false = Equal("/region", "eu"), Equal("/region", "us")
+
+    assert evaluate(logical("$and", true, true), METADATA) is True
+    assert evaluate(logical("$and", true, false), METADATA) is False
+    assert evaluate(logical("$or", false, true), METADATA) is True
+    assert evaluate(logical("$or", false, false), METADATA) is False
+    assert evaluate(logical("$nor", false, false), METADATA) is True
+    assert evaluate(logical("$nor", false, true), METADATA) is False
+    assert evaluate(logical("$and", true, logical("$or", false, logical("$nor", false))), METADATA) is True
+
+
+def test_logical_operators_with_undecidable_argument_return_none():
+    assert evaluate(logical("$or", Equal("/region", "eu"), Equal("/missing", 1)), METADATA) is None
+    assert evaluate(logical("$and", logical("$nor", Equal("/missing", 1))), METADATA) is None
+
+
+class FakeClient:
+    def __init__(self, loop, login, metadata=None, closing=False):
+        self.loop = loop
+        self.dsn = types.SimpleNamespace(login=login)
+        self._metadata = metadata or {}
+        self._closing = closing
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    monkeypatch.setattr(loopback, "_clients", weakref.WeakSet())
+    registered = []
+
+    def add(*args, **kwargs):
+        client = FakeClient(*args, **kwargs)
+        registered.append(client)  # The registry only holds weak references.
+        loopback.register(client)
+        return client
+
+    return add
+
+
+def target(**kwargs):
+    return Target(**kwargs).as_dict()
+
+
+def test_resolves_matching_client_on_same_loop(clients):
+    loop = object()
+    sender = clients(loop, "sender")
+    receiver = clients(loop, "app", {"region": "eu"})
+    clients(loop, "app", {"region": "us"})
+
+    ops = [Equal("/region", "eu")]
+    assert resolve(sender, target(application="app", operators=ops)) is receiver
+
+
+def test_routing_is_left_to_the_gateway(clients):
+    loop = object()
+    sender = clients(loop, "sender")
+    clients(object(), "other-loop")
+    clients(loop, "closing", closing=True)
+    clients(loop, "app", {"region": "eu"})
+
+    assert resolve(sender, target(application="app", key="k")) is None
+    assert resolve(sender, target(application="app", selector={"$min": "/load"})) is None
+    assert resolve(sender, target(operators=[Equal("/region", "eu")])) is None
+    assert resolve(sender, target(application="other-loop")) is None
+    assert resolve(sender, target(application="closing")) is None
+    assert resolve(sender, target(application="app", operators=[Equal("/region", "us")])) is None
+    # Metadata the client does not have cannot be decided locally.
+    assert resolve(sender, target(application="app", operators=[Equal("/load", 1)])) is None
+
+
+def test_unregistered_clients_are_not_resolved(clients):
+    loop = object()
+    sender = clients(loop, "sender")
+    receiver = clients(loop, "app")
+
+    loopback.unregister(receiver)
+    assert resolve(sender, target(application="app")) is None
@@ -0,0 +1,15 @@
+import asyncio
+
+import pytest
+
+from singyeong.monitor import LoopMonitor
+
+
+@pytest.mark.parametrize("kwargs", [{"threshold": 0}, {"threshold": -1}, {"interval": 0}])
+def test_non_positive_settings_are_rejected(kwargs):
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            LoopMonitor(loop, **kwargs)
+    finally:
+        loop.close()
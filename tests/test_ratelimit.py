@@ -0,0 +1,152 @@
+import asyncio
+import types
+
+import pytest
+
+import singyeong
+from singyeong import ratelimit
+from singyeong.enums import RateLimitPolicy
+from singyeong.ratelimit import RateLimiter, TokenBucket
+
+
+class Clock:
+    """Replaces time.monotonic and asyncio.sleep of the ratelimit module, sleeping only advances the clock."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit, "asyncio", types.SimpleNamespace(sleep=clock.sleep))
+    return clock
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_bucket_burst_and_refill(clock):
+    bucket = TokenBucket(2, 3)
+
+    for _ in range(3):
+        assert bucket.delay(clock.now) == 0
+        bucket.consume()
+
+    assert bucket.delay(clock.now) == pytest.approx(0.5)
+    assert bucket.delay(clock.now + 0.25) == pytest.approx(0.25)
+    assert bucket.delay(clock.now + 0.5) == 0
+
+
+def test_bucket_refill_is_capped(clock):
+    bucket = TokenBucket(10, 2)
+    bucket.consume()
+    bucket.consume()
+
+    bucket.delay(clock.now + 60)
+    assert bucket._tokens == 2
+
+
+def test_bucket_defaults_and_validation():
+    assert TokenBucket(0.5).capacity == 1
+    assert TokenBucket(5).capacity == 5
+    assert TokenBucket.from_limit((5, 20)).capacity == 20
+
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_wait_policy_sleeps_for_a_token(clock):
+    limiter = RateLimiter(total=(10, 1))
+
+    async def main():
+        return [await limiter.acquire("SEND", "app") for _ in range(3)]
+
+    assert run(main()) == [True, True, True]
+    assert clock.sleeps == [pytest.approx(0.1), pytest.approx(0.1)]
+
+
+def test_drop_policy(clock):
+    limiter = RateLimiter(total=(10, 2), policy=RateLimitPolicy.DROP)
+
+    async def main():
+        return [await limiter.acquire("SEND", "app") for _ in range(3)]
+
+    assert run(main()) == [True, True, False]
+    assert clock.sleeps == []
+
+
+def test_drop_droppable_policy(clock):
+    limiter = RateLimiter(total=(10, 1), policy=RateLimitPolicy.DROP_DROPPABLE)
+
+    async def main():
+        return [
+            await limiter.acquire("SEND", "app", droppable=False),
+            await limiter.acquire("SEND", "app", droppable=True),
+            await limiter.acquire("SEND", "app", droppable=False),
+        ]
+
+    assert run(main()) == [True, False, True]
+    assert clock.sleeps == [pytest.approx(0.1)]
+
+
+def test_application_and_event_buckets(clock):
+    limiter = RateLimiter(application=(1, 1), events={"BROADCAST": (1, 1)}, policy="drop")
+
+    async def main():
+        return [
+            await limiter.acquire("SEND", "a"),
+            await limiter.acquire("SEND", "b"),
+            await limiter.acquire("SEND", "a"),
+            await limiter.acquire("BROADCAST", None),
+            await limiter.acquire("BROADCAST", None),
+        ]
+
+    assert run(main()) == [True, True, False, True, False]
+
+
+def test_dropped_dispatch_returns_false(clock):
+    class Socket:
+        def __init__(self):
+            self.frames = []
+
+        async def send_json(self, data):
+            self.frames.append(data)
+
+    loop = asyncio.new_event_loop()
+    try:
+        client = singyeong.Client(
+            "singyeong://app@localhost:4567",
+            loop=loop,
+            rate_limit=(10, 2),
+            rate_limit_policy=RateLimitPolicy.DROP
+        )
+        client.ws = Socket()
+        target = singyeong.Target(application="app")
+
+        async def main():
+            return [
+                await client.send(target, 1),
+                await client.broadcast(target, 2),
+                await client.send(target, 3),
+                await client.broadcast(target, 4),
+            ]
+
+        assert loop.run_until_complete(main()) == [True, True, False, False]
+        assert [frame['d']['payload'] for frame in client.ws.frames] == [1, 2]
+    finally:
+        loop.close()
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from singyeong.enums import Lane
+from singyeong.exceptions import WSClosed
+from singyeong.scheduler import OutboundScheduler
+
+
+def run(main):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main(loop))
+    finally:
+        loop.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+        self.gate = None
+
+    async def send(self, data):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(data)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _fill(scheduler, lane, tag, count, size):
+    return [asyncio.ensure_future(scheduler.put(lane, tag * size)) for _ in range(count)]
+
+
+def test_weighted_round_robin():
+    async def main(loop):
+        recorder = Recorder()
+        recorder.gate = asyncio.Event()
+        scheduler = OutboundScheduler(recorder.send, loop=loop, quantum=100,
+                                      weights={Lane.SEND: 3, Lane.BROADCAST: 1})
+
+        puts = await _fill(scheduler, Lane.SEND, "s", 40, 100)
+        puts += await _fill(scheduler, Lane.BROADCAST, "b", 40, 100)
+        await settle()
+
+        recorder.gate.set()
+        await asyncio.gather(*puts)
+        scheduler.close()
+        return recorder.sent
+
+    sent = run(main)
+    # The first frame is held by the writer until the gate opens, count the rounds after it.
+    window = [data[0] for data in sent[1:41]]
+    assert window.count("s") == 30
+    assert window.count("b") == 10
+
+
+def test_deficit_carries_over_for_large_frames():
+    async def main(loop):
+        recorder = Recorder()
+        recorder.gate = asyncio.Event()
+        scheduler = OutboundScheduler(recorder.send, loop=loop, quantum=100,
+                                      weights={Lane.SEND: 1, Lane.BROADCAST: 1})
+
+        puts = await _fill(scheduler, Lane.SEND, "s", 10, 250)
+        puts += await _fill(scheduler, Lane.BROADCAST, "b", 25, 100)
+        await settle()
+
+        recorder.gate.set()
+        await asyncio.gather(*puts)
+        scheduler.close()
+        return recorder.sent
+
+    sent = run(main)
+    # Equal weights share bytes, not frames: 250 byte frames go out about 2.5 times less often.
+    window = [data[0] for data in sent[1:22]]
+    assert abs(window.count("s") * 250 - window.count("b") * 100) <= 300
+
+
+def test_control_and_metadata_go_first():
+    async def main(loop):
+        recorder = Recorder()
+        recorder.gate = asyncio.Event()
+        scheduler = OutboundScheduler(recorder.send, loop=loop)
+
+        puts = await _fill(scheduler, Lane.SEND, "s", 5, 10)
+        await settle()
+        puts += await _fill(scheduler, Lane.METADATA, "m", 1, 10)
+        puts += await _fill(scheduler, Lane.CONTROL, "c", 1, 10)
+        await settle()
+
+        recorder.gate.set()
+        await asyncio.gather(*puts)
+        scheduler.close()
+        return recorder.sent
+
+    sent = run(main)
+    # One SEND frame was already being written when the others arrived.
+    assert [data[0] for data in sent[:3]] == ["s", "c", "m"]
+
+
+def test_budget_blocks_until_drained():
+    async def main(loop):
+        recorder = Recorder()
+        recorder.gate = asyncio.Event()
+        scheduler = OutboundScheduler(recorder.send, loop=loop,
+                                      budgets={Lane.SEND: 250})
+
+        first = await _fill(scheduler, Lane.SEND, "s", 3, 100)
+        await settle()
+        # One frame is being written, two (200 bytes) are queued.
+        assert scheduler.pending == 2
+
+        blocked = asyncio.ensure_future(scheduler.put(Lane.SEND, "x" * 100))
+        await asyncio.sleep(0.01)
+        assert scheduler.pending == 2
+        assert not blocked.done()
+
+        recorder.gate.set()
+        await asyncio.wait_for(asyncio.gather(blocked, *first), 1)
+        scheduler.close()
+        return recorder.sent
+
+    sent = run(main)
+    assert sent[-1] == "x" * 100
+
+
+def test_oversized_frame_passes_empty_lane():
+    async def main(loop):
+        recorder = Recorder()
+        scheduler = OutboundScheduler(recorder.send, loop=loop,
+                                      budgets={Lane.SEND: 10})
+        await asyncio.wait_for(scheduler.put(Lane.SEND, "s" * 100), 1)
+        scheduler.close()
+        return recorder.sent
+
+    assert run(main) == ["s" * 100]
+
+
+def test_non_positive_weight_is_rejected():
+    async def main(loop):
+        OutboundScheduler(Recorder().send, loop=loop, weights={Lane.BROADCAST: 0})
+
+    with pytest.raises(ValueError):
+        run(main)
+
+
+def test_close_fails_inflight_and_queued_frames():
+    async def main(loop):
+        recorder = Recorder()
+        recorder.gate = asyncio.Event()  # Never set, the first frame stays in flight.
+        scheduler = OutboundScheduler(recorder.send, loop=loop)
+
+        puts = await _fill(scheduler, Lane.SEND, "s", 3, 10)
+        await settle()
+        assert scheduler.pending == 2
+
+        scheduler.close(WSClosed())
+        results = await asyncio.gather(*puts, return_exceptions=True)
+
+        with pytest.raises(WSClosed):
+            await scheduler.put(Lane.CONTROL, "c")
+
+        return results
+
+    results = run(main)
+    assert all(isinstance(result, WSClosed) for result in results)